@@ -0,0 +1,187 @@
+import sys
+import threading
+import unittest
+from unittest import mock
+
+import todo_original as todo
+
+
+# Scan-based reference implementations: the behavior of todo_original
+# before its tag index was introduced.
+
+def scan_filter(tags, match_all=False):
+    if not tags:
+        return list(todo._todos)
+    check = all if match_all else any
+    return [item for item in todo._todos
+            if check(tag in item.get("tags", []) for tag in tags)]
+
+
+def scan_stats():
+    stats = {}
+    for item in todo._todos:
+        for tag in item.get("tags", []):
+            stats[tag] = stats.get(tag, 0) + 1
+    return stats
+
+
+def scan_all_tags():
+    return sorted({tag for item in todo._todos
+                   for tag in item.get("tags", [])})
+
+
+QUERIES = [[], ["work"], ["home"], ["work", "home"], ["urgent"],
+           ["work", "urgent"], ["missing"]]
+
+
+class TagIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        todo._todos.clear()
+
+    def assertMatchesScan(self):
+        for query in QUERIES:
+            for match_all in (False, True):
+                self.assertEqual(todo.filter_by_tags(query, match_all),
+                                 scan_filter(query, match_all))
+        # Key order is visible to callers, so compare items, not dicts.
+        self.assertEqual(list(todo.show_tag_stats().items()),
+                         list(scan_stats().items()))
+        self.assertEqual(todo.list_all_tags(), scan_all_tags())
+
+    def test_duplicate_tags_counted_per_occurrence(self):
+        todo.add_todo("a", ["work", "work", "home"])
+        todo.add_todo("b", ["work"])
+        self.assertEqual(todo.show_tag_stats(), {"work": 3, "home": 1})
+        self.assertMatchesScan()
+
+        todo.remove_tag_from_task(0, "work")
+        self.assertEqual(todo.filter_by_tags(["work"]), todo._todos)
+        self.assertMatchesScan()
+
+        todo.remove_tag_from_task(0, "work")
+        self.assertEqual(todo.filter_by_tags(["work"]), [todo._todos[1]])
+        self.assertMatchesScan()
+
+    def test_remove_and_re_add(self):
+        todo.add_todo("a", ["x"])
+        todo.add_todo("b", ["y"])
+        todo.add_tag_to_task(0, "z")
+        self.assertEqual(list(todo.show_tag_stats()), ["x", "z", "y"])
+        self.assertMatchesScan()
+
+        todo.remove_tag_from_task(0, "x")
+        todo.remove_tag_from_task(1, "y")
+        self.assertMatchesScan()
+
+        todo.add_tag_to_task(1, "x")
+        todo.add_tag_to_task(0, "y")
+        self.assertEqual(list(todo.show_tag_stats()), ["z", "y", "x"])
+        self.assertMatchesScan()
+
+    def test_tag_order_follows_first_occurrence(self):
+        todo.add_todo("a", ["x", "y"])
+        todo.add_todo("b", ["z", "y"])
+        todo.add_tag_to_task(1, "w")
+        self.assertEqual(list(todo.show_tag_stats()), ["x", "y", "z", "w"])
+
+        todo.remove_tag_from_task(0, "y")
+        self.assertEqual(list(todo.show_tag_stats()), ["x", "z", "y", "w"])
+        todo.add_tag_to_task(0, "w")
+        self.assertEqual(list(todo.show_tag_stats()), ["x", "w", "z", "y"])
+        self.assertMatchesScan()
+
+    def test_write_reindexes_only_the_changed_task(self):
+        for i in range(100):
+            todo.add_todo("task %d" % i, ["work", "t%d" % i])
+        todo.show_tag_stats()
+
+        with mock.patch.object(todo, "_rebuild_tag_index",
+                               wraps=todo._rebuild_tag_index) as rebuild, \
+                mock.patch.object(todo, "_index_tag",
+                                  wraps=todo._index_tag) as index_tag:
+            todo.add_tag_to_task(50, "urgent")
+            self.assertEqual(todo.filter_by_tags(["urgent"]),
+                             [todo._todos[50]])
+            todo.show_tag_stats()
+            todo.list_all_tags()
+        rebuild.assert_not_called()
+        index_tag.assert_called_once_with(50, "urgent")
+        self.assertMatchesScan()
+
+    def test_direct_append_to_todos_rebuilds(self):
+        todo.add_todo("a", ["work"])
+        self.assertMatchesScan()
+        todo._todos.append({"task": "b", "completed": False,
+                            "tags": ["home"]})
+        self.assertMatchesScan()
+
+    def test_reset_by_clearing_todos(self):
+        todo.add_todo("a", ["work"])
+        todo.add_todo("b", ["work", "home"])
+        self.assertMatchesScan()
+
+        todo._todos.clear()
+        self.assertEqual(todo.filter_by_tags(["work"]), [])
+        self.assertEqual(todo.show_tag_stats(), {})
+        self.assertEqual(todo.list_all_tags(), [])
+
+        todo.add_todo("c", ["home"])
+        self.assertMatchesScan()
+
+    def test_concurrent_readers_and_writers(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        errors = []
+
+        def run(target, *args):
+            try:
+                target(*args)
+            except Exception as exc:
+                errors.append(exc)
+
+        def write(offset):
+            for i in range(offset, 200, 4):
+                todo.add_tag_to_task(i, "t%d" % (i % 5))
+                todo.add_todo("extra %d" % i, ["t%d" % (i % 3), "work"])
+                todo.remove_tag_from_task(i, "t%d" % (i % 7))
+
+        def read():
+            for _ in range(100):
+                todo.filter_by_tags(["t1"])
+                todo.show_tag_stats()
+                todo.list_all_tags()
+
+        for _ in range(25):
+            todo._todos.clear()
+            for i in range(200):
+                todo.add_todo("task %d" % i, ["work", "t%d" % (i % 7)])
+            threads = [threading.Thread(target=run, args=(write, n))
+                       for n in range(4)]
+            threads += [threading.Thread(target=run, args=(read,))
+                        for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(len(todo._todos), 400)
+            self.assertMatchesScan()
+
+    def test_unhashable_tags(self):
+        todo.add_todo("a", [["nested"], "work"])
+        self.assertEqual(len(todo._todos), 1)
+        self.assertEqual(todo.filter_by_tags(["work"]), todo._todos)
+        self.assertEqual(todo.filter_by_tags([["nested"]]), todo._todos)
+        with self.assertRaises(TypeError):
+            todo.show_tag_stats()
+
+        todo._todos.clear()
+        todo.add_todo("b", ["work"])
+        self.assertMatchesScan()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,8 @@
 # This file intentionally keeps a very small feature set so that
 # the advanced tag system can extend it without breaking behavior.
 
-from typing import List, Optional, Dict
+import threading
+from typing import List, Optional, Dict, Set
 
 
 # ---------------------------------------------------------------------------
@@ -12,6 +13,104 @@ from typing import List, Optional, Dict
 
 _todos: List[Dict] = []
 
+# Tag indexes, updated by the public functions below so tag queries never
+# rescan every task. Tags must only be changed through this API: mutating
+# a task's "tags" list directly is not seen by the indexes. Changing the
+# number of tasks (e.g. resetting with _todos.clear()) is detected and
+# triggers a full rebuild. Tasks are never removed through the API, so list
+# positions are stable task ids.
+#
+# - _tag_counts: tag -> occurrences, in task-scan order unless
+#   _tag_order_dirty is set (reordered lazily by show_tag_stats)
+# - _tasks_by_tag: tag -> positions of the tasks carrying it
+# - _first_task: tag -> position of the first task carrying it
+# - _indexed_count: number of tasks indexed, or -1 while a task holds an
+#   unhashable tag and the indexes cannot be used
+#
+# All index reads and writes happen under _index_lock.
+_tag_counts: Dict[str, int] = {}
+_tasks_by_tag: Dict[str, Set[int]] = {}
+_first_task: Dict[str, int] = {}
+_tag_order_dirty = False
+_indexed_count = 0
+_index_lock = threading.Lock()
+
+
+def _rebuild_tag_index() -> None:
+    """Rebuild every index from _todos.
+
+    Raises TypeError for unhashable tags, leaving the indexes untouched.
+    """
+    global _tag_counts, _tasks_by_tag, _first_task
+    global _tag_order_dirty, _indexed_count
+    counts: Dict[str, int] = {}
+    by_tag: Dict[str, Set[int]] = {}
+    first: Dict[str, int] = {}
+    for index, item in enumerate(_todos):
+        for tag in item.get("tags", []):
+            counts[tag] = counts.get(tag, 0) + 1
+            by_tag.setdefault(tag, set()).add(index)
+            first.setdefault(tag, index)
+    _tag_counts, _tasks_by_tag, _first_task = counts, by_tag, first
+    _tag_order_dirty = False
+    _indexed_count = len(_todos)
+
+
+def _sync_tag_index() -> None:
+    if _indexed_count != len(_todos):
+        _rebuild_tag_index()
+
+
+def _index_tag(index: int, tag: str) -> None:
+    """Record one more occurrence of tag, appended to task index."""
+    global _tag_order_dirty
+    count = _tag_counts.get(tag)
+    if count is None:
+        # A new tag lands at the end of _tag_counts; that is its scan
+        # position unless some tag is first seen in a later task.
+        if _tag_counts and index < _first_task[next(reversed(_tag_counts))]:
+            _tag_order_dirty = True
+        _tag_counts[tag] = 1
+        _first_task[tag] = index
+    else:
+        _tag_counts[tag] = count + 1
+        if index < _first_task[tag]:
+            _first_task[tag] = index
+            _tag_order_dirty = True
+    _tasks_by_tag.setdefault(tag, set()).add(index)
+
+
+def _unindex_tag(index: int, tag: str, still_in_task: bool) -> None:
+    """Record the removal of tag's first occurrence in task index."""
+    global _tag_order_dirty
+    if not still_in_task:
+        positions = _tasks_by_tag[tag]
+        positions.discard(index)
+        if not positions:
+            del _tasks_by_tag[tag]
+    count = _tag_counts[tag] - 1
+    if not count:
+        del _tag_counts[tag]
+        del _first_task[tag]
+        return
+    _tag_counts[tag] = count
+    if index == _first_task[tag]:
+        _tag_order_dirty = True
+        if not still_in_task:
+            _first_task[tag] = min(_tasks_by_tag[tag])
+
+
+def _restore_tag_order() -> None:
+    global _tag_counts, _tag_order_dirty
+
+    def first_seen(tag):
+        index = _first_task[tag]
+        return index, _todos[index]["tags"].index(tag)
+
+    _tag_counts = {tag: _tag_counts[tag]
+                   for tag in sorted(_tag_counts, key=first_seen)}
+    _tag_order_dirty = False
+
 
 # ---------------------------------------------------------------------------
 # Public API
@@ -19,13 +118,31 @@ _todos: List[Dict] = []
 
 def add_todo(task: str, tags: Optional[List[str]] = None) -> None:
     """Add a task with optional string tags."""
+    global _indexed_count
     if tags is None:
         tags = []
-    _todos.append({
-        "task": task,
-        "completed": False,
-        "tags": list(tags),
-    })
+    item_tags = list(tags)
+    with _index_lock:
+        try:
+            _sync_tag_index()
+            for tag in item_tags:
+                hash(tag)
+        except TypeError:
+            indexable = False
+        else:
+            indexable = True
+        index = len(_todos)
+        _todos.append({
+            "task": task,
+            "completed": False,
+            "tags": item_tags,
+        })
+        if indexable:
+            for tag in item_tags:
+                _index_tag(index, tag)
+            _indexed_count = index + 1
+        else:
+            _indexed_count = -1
 
 
 def list_todos() -> List[Dict]:
@@ -42,50 +159,76 @@ def filter_by_tags(tags: List[str], match_all: bool = False) -> List[Dict]:
     if not tags:
         return list(_todos)
 
-    filtered = []
-    for item in _todos:
-        item_tags = item.get("tags", [])
+    with _index_lock:
+        try:
+            _sync_tag_index()
+            matches = [_tasks_by_tag.get(tag, set()) for tag in set(tags)]
+        except TypeError:
+            # Unhashable tags cannot be indexed; compare them one by one.
+            check = all if match_all else any
+            return [item for item in _todos
+                    if check(tag in item.get("tags", []) for tag in tags)]
         if match_all:
-            if all(tag in item_tags for tag in tags):
-                filtered.append(item)
+            indexes = min(matches, key=len).intersection(*matches)
         else:
-            if any(tag in item_tags for tag in tags):
-                filtered.append(item)
-    return filtered
+            indexes = set().union(*matches)
+        return [_todos[i] for i in sorted(indexes)]
 
 
 def add_tag_to_task(index: int, tag: str) -> None:
     """Append a single string tag to a task by index."""
+    global _indexed_count
     if index < 0 or index >= len(_todos):
         raise IndexError("task index out of range")
-    if tag not in _todos[index]["tags"]:
-        _todos[index]["tags"].append(tag)
+    with _index_lock:
+        item_tags = _todos[index]["tags"]
+        try:
+            _sync_tag_index()
+            present = index in _tasks_by_tag.get(tag, ())
+        except TypeError:
+            if tag not in item_tags:
+                item_tags.append(tag)
+                _indexed_count = -1
+            return
+        if not present:
+            item_tags.append(tag)
+            _index_tag(index, tag)
 
 
 def remove_tag_from_task(index: int, tag: str) -> None:
     """Remove a tag from a task."""
+    global _indexed_count
     if index < 0 or index >= len(_todos):
         raise IndexError("task index out of range")
-    if tag in _todos[index]["tags"]:
-        _todos[index]["tags"].remove(tag)
+    with _index_lock:
+        item_tags = _todos[index]["tags"]
+        try:
+            _sync_tag_index()
+            present = index in _tasks_by_tag.get(tag, ())
+        except TypeError:
+            if tag in item_tags:
+                item_tags.remove(tag)
+                _indexed_count = -1
+            return
+        if present:
+            item_tags.remove(tag)
+            _unindex_tag(index, tag, tag in item_tags)
 
 
 def show_tag_stats() -> Dict[str, int]:
     """Return a dict of tag -> count."""
-    stats = {}
-    for item in _todos:
-        for tag in item.get("tags", []):
-            stats[tag] = stats.get(tag, 0) + 1
-    return stats
+    with _index_lock:
+        _sync_tag_index()
+        if _tag_order_dirty:
+            _restore_tag_order()
+        return dict(_tag_counts)
 
 
 def list_all_tags() -> List[str]:
     """Return all distinct string tags."""
-    result = set()
-    for item in _todos:
-        for tag in item.get("tags", []):
-            result.add(tag)
-    return sorted(result)
+    with _index_lock:
+        _sync_tag_index()
+        return sorted(_tag_counts)
 
 
 # ---------------------------------------------------------------------------